@@ -3,7 +3,10 @@ Module de description d'images via IA.
 
 Ce module fournit deux endpoints principaux :
 - /describe/gemini : Analyse d'image avec Google Gemini Vision
+  (variante /describe/gemini/batch pour les lots hors temps réel)
 - /describe/groq : Génération de recommandations avec Groq LLM
+  (variante /describe/groq/stream en Server-Sent Events)
+- /describe/chain : Enchaîne Gemini puis Groq côté serveur
 
 Pipeline typique :
 1. L'utilisateur envoie une image en base64
@@ -14,10 +17,16 @@ Pipeline typique :
 
 import os
 import json
+import asyncio
+import hashlib
 from pathlib import Path
 
 import httpx
-from fastapi import APIRouter, HTTPException
+import orjson
+from cachetools import TTLCache
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 from pydantic import BaseModel, Field
 
 
@@ -31,10 +40,10 @@ router = APIRouter()
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.0-flash-exp")  # Modèle vision rapide
 GEMINI_API_VERSION = os.getenv("GEMINI_API_VERSION", "v1beta")
-GEMINI_URL = (
-    f"https://generativelanguage.googleapis.com/"
-    f"{GEMINI_API_VERSION}/models/{GEMINI_MODEL}:generateContent"
-)
+GEMINI_BASE_URL = f"https://generativelanguage.googleapis.com/{GEMINI_API_VERSION}"
+GEMINI_URL = f"{GEMINI_BASE_URL}/models/{GEMINI_MODEL}:generateContent"
+# Batch Mode : traitement asynchrone (différé) à coût réduit
+GEMINI_BATCH_URL = f"{GEMINI_BASE_URL}/models/{GEMINI_MODEL}:batchGenerateContent"
 
 # Debug: Afficher les premières lettres de la clé pour vérifier le chargement
 if GEMINI_API_KEY:
@@ -42,17 +51,29 @@ if GEMINI_API_KEY:
 else:
     print("[DEBUG] GEMINI_API_KEY is missing", flush=True)
 
+# Taille max d'une image décodée (limite Google des données inline : 20 Mo)
+GEMINI_MAX_IMAGE_BYTES = int(os.getenv("GEMINI_MAX_IMAGE_BYTES", str(20 * 1024 * 1024)))
+
+# Cache des réponses Gemini : les frames successives d'une même scène
+# (caméra à 1-2 fps) sont souvent identiques, inutile de rappeler l'API
+GEMINI_CACHE_SIZE = int(os.getenv("GEMINI_CACHE_SIZE", "1024"))
+GEMINI_CACHE_TTL = float(os.getenv("GEMINI_CACHE_TTL", "300"))
+_GEMINI_CACHE: TTLCache = TTLCache(maxsize=GEMINI_CACHE_SIZE, ttl=GEMINI_CACHE_TTL)
+
 # Configuration Groq API (LLM Llama)
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 GROQ_MODEL = os.getenv("GROQ_MODEL", "llama-3.1-8b-instant")  # Modèle rapide et économique
 GROQ_URL = "https://api.groq.com/openai/v1/chat/completions"
 
-# Chargement des profils utilisateur depuis le fichier JSON
+# Cache des réponses Groq : d'une frame à l'autre la description (et donc
+# le prompt) se répète souvent au sein d'une même session
+GROQ_CACHE_SIZE = int(os.getenv("GROQ_CACHE_SIZE", "4096"))
+GROQ_CACHE_TTL = float(os.getenv("GROQ_CACHE_TTL", "600"))
+_GROQ_CACHE: TTLCache = TTLCache(maxsize=GROQ_CACHE_SIZE, ttl=GROQ_CACHE_TTL)
+
+# Catalogue des profils utilisateur (fichier JSON relu à chaud, voir _load_profiles)
 PROFILE_PATH = Path(__file__).parent / "user_profiles.json"
-try:
-    _PROFILES = json.loads(PROFILE_PATH.read_text(encoding="utf-8"))
-except FileNotFoundError:
-    _PROFILES = {}  # Aucun profil pré-défini
+_profiles_state: dict = {"path": None, "mtime": None, "profiles": {}, "json": {}}
 
 
 # ============================================================================
@@ -79,6 +100,26 @@ class DescribeRequest(BaseModel):
     )
 
 
+class GeminiBatchRequest(BaseModel):
+    """
+    Requête de description d'images en lot via Gemini Batch Mode.
+
+    Attributes:
+        requests: Images à analyser (même format que /describe/gemini).
+                  Les résultats sont renvoyés avec la clé "request-<index>".
+        display_name: Nom du job visible dans la console Google
+    """
+    requests: list[DescribeRequest] = Field(
+        ...,
+        min_length=1,
+        description="Liste de requêtes d'analyse d'image"
+    )
+    display_name: str = Field(
+        default="vision360-batch",
+        description="Nom d'affichage du job batch"
+    )
+
+
 class GroqRequest(BaseModel):
     """
     Requête pour la génération de recommandations via Groq.
@@ -108,12 +149,220 @@ class GroqRequest(BaseModel):
     )
 
 
+class ChainRequest(DescribeRequest):
+    """
+    Requête pour la chaîne complète Gemini -> Groq en un seul appel.
+
+    Reprend les champs de DescribeRequest (image, prompt) et ceux de
+    GroqRequest qui ne dépendent pas de la description (profil, consigne).
+
+    Attributes:
+        profile: Identifiant du profil dans le catalogue
+        instruction: Format de sortie attendu côté Groq
+        profile_override: Profil personnalisé prioritaire sur le catalogue
+    """
+    profile: str = GroqRequest.model_fields["profile"]
+    instruction: str = GroqRequest.model_fields["instruction"]
+    profile_override: dict | None = GroqRequest.model_fields["profile_override"]
+
+
+# ============================================================================
+# Dépendances
+# ============================================================================
+
+def get_http(request: Request) -> httpx.AsyncClient:
+    """
+    Fournit le client HTTP partagé créé au démarrage de l'application.
+
+    Le client est instancié dans le lifespan de main.py et réutilisé par
+    tous les appels sortants, ce qui conserve les connexions ouvertes.
+
+    Args:
+        request: Requête entrante (donne accès à app.state)
+
+    Returns:
+        httpx.AsyncClient partagé
+    """
+    return request.app.state.http
+
+
+# ============================================================================
+# Fonctions utilitaires
+# ============================================================================
+
+def _strip_data_prefix(b64: str) -> str:
+    """
+    Extrait le base64 pur si un préfixe data: est présent.
+
+    Seul le préfixe est testé : évite de parcourir toute l'image.
+
+    Args:
+        b64: Image base64, ex: "data:image/jpeg;base64,/9j/4AAQ..."
+
+    Returns:
+        Base64 sans préfixe
+    """
+    if b64.startswith("data:"):
+        comma = b64.find(",")
+        if comma != -1:
+            return b64[comma + 1:]
+    return b64
+
+
+def _load_profiles() -> tuple[dict, dict[str, str]]:
+    """
+    Renvoie le catalogue des profils, relu uniquement si le fichier a changé.
+
+    Le résultat est mémorisé par (chemin, mtime) : un simple stat par appel,
+    et une modification de user_profiles.json est prise en compte sans
+    redémarrer le serveur. Un fichier JSON invalide est signalé dans les
+    logs et les profils précédemment chargés sont conservés.
+
+    Returns:
+        Tuple (profils, profils pré-sérialisés en JSON pour le prompt Groq).
+        Les profils vides sont omis du second dict : comme dans la
+        résolution du profil, ils retombent sur "default".
+    """
+    state = _profiles_state
+    try:
+        mtime = PROFILE_PATH.stat().st_mtime_ns
+    except FileNotFoundError:
+        return {}, {}  # Aucun profil pré-défini
+
+    if (PROFILE_PATH, mtime) != (state["path"], state["mtime"]):
+        state["path"], state["mtime"] = PROFILE_PATH, mtime
+        try:
+            profiles = json.loads(PROFILE_PATH.read_text(encoding="utf-8"))
+        except json.JSONDecodeError as exc:
+            print(f"[WARN] {PROFILE_PATH.name} invalide, profils conservés: {exc}", flush=True)
+        else:
+            state["profiles"] = profiles
+            state["json"] = {
+                k: json.dumps(v, ensure_ascii=False) for k, v in profiles.items() if v
+            }
+    return state["profiles"], state["json"]
+
+
+def _decoded_len(b64: str) -> int:
+    """
+    Calcule la taille en octets du base64 une fois décodé, sans le décoder.
+
+    Calcul en O(1) à partir de la longueur et du padding "=" final : aucun
+    parcours de la chaîne, donc rien de coûteux sur la boucle asyncio.
+
+    Args:
+        b64: Base64 pur (sans préfixe data:)
+
+    Returns:
+        Nombre d'octets de l'image décodée
+    """
+    padding = 2 if b64.endswith("==") else 1 if b64.endswith("=") else 0
+    return len(b64) * 3 // 4 - padding
+
+
+def _image_digest(b64: str) -> bytes:
+    """Empreinte SHA-256 de l'image (clé de cache), appelée hors boucle asyncio."""
+    return hashlib.sha256(b64.encode()).digest()
+
+
+def _gemini_content(prompt: str, b64: str) -> dict:
+    """Construit un bloc "contents" multimodal Gemini (texte + image JPEG)."""
+    return {
+        "parts": [
+            {"text": prompt},
+            {
+                "inline_data": {
+                    "mime_type": "image/jpeg",
+                    "data": b64,
+                }
+            },
+        ]
+    }
+
+
+def _gemini_parts(data: dict) -> list:
+    """Renvoie les "parts" du premier candidat d'une réponse generateContent."""
+    return data.get("candidates", [{}])[0].get("content", {}).get("parts", [])
+
+
+def _gemini_text(parts: list) -> str:
+    """
+    Concatène le texte des "parts" d'une réponse Gemini.
+
+    Expression génératrice : pas de liste intermédiaire construite. Le
+    filtre isinstance est conservé, le schéma ne garantit pas des dicts.
+    """
+    return " ".join(p.get("text", "") for p in parts if isinstance(p, dict)).strip()
+
+
+def _gemini_headers() -> dict:
+    """Headers d'authentification pour l'API Gemini."""
+    return {
+        "Content-Type": "application/json",
+        "x-goog-api-key": GEMINI_API_KEY,
+    }
+
+
+# Prompt système définissant le comportement de l'assistant Groq
+GROQ_SYSTEM_PROMPT = (
+    "Tu es un assistant de sécurité pour la mobilité PMR. "
+    "Réponds STRICTEMENT en JSON sans texte hors JSON. "
+    "Inclue des risques potentiels et des actions/recommandations courtes."
+)
+
+
+def _groq_user_prompt(payload: GroqRequest) -> str:
+    """
+    Construit le prompt utilisateur Groq (profil, description, consigne).
+
+    Priorité au profil envoyé par le client, sinon utiliser le catalogue.
+    """
+    if payload.profile_override:
+        profile_json = json.dumps(payload.profile_override, ensure_ascii=False)
+    else:
+        _, profile_jsons = _load_profiles()
+        profile_json = profile_jsons.get(payload.profile) or profile_jsons.get("default", "{}")
+
+    return (
+        f"Profil: {payload.profile}\n"
+        f"Données profil: {profile_json}\n"
+        f"Description:\n{payload.description}\n"
+        f"Consigne de sortie: {payload.instruction}"
+    )
+
+
+def _groq_body(user_prompt: str, stream: bool = False) -> dict:
+    """Body de l'API Groq (format OpenAI-compatible)."""
+    body = {
+        "model": GROQ_MODEL,
+        "messages": [
+            {"role": "system", "content": GROQ_SYSTEM_PROMPT},
+            {"role": "user", "content": user_prompt},
+        ],
+        "temperature": 0.2,  # Basse température pour réponses cohérentes
+    }
+    if stream:
+        body["stream"] = True
+    return body
+
+
+def _groq_headers() -> dict:
+    """Headers d'authentification pour l'API Groq."""
+    return {
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {GROQ_API_KEY}",
+    }
+
+
 # ============================================================================
 # Endpoints API
 # ============================================================================
 
 @router.post("/describe/gemini")
-async def describe_gemini(payload: DescribeRequest) -> dict:
+async def describe_gemini(
+    payload: DescribeRequest,
+    http: httpx.AsyncClient = Depends(get_http),
+) -> dict:
     """
     Analyse une image avec Google Gemini Vision API.
 
@@ -123,6 +372,7 @@ async def describe_gemini(payload: DescribeRequest) -> dict:
 
     Args:
         payload: Requête contenant l'image base64 et le prompt
+        http: Client HTTP partagé (injecté par FastAPI)
 
     Returns:
         dict contenant:
@@ -130,42 +380,32 @@ async def describe_gemini(payload: DescribeRequest) -> dict:
         - raw: Réponse brute de l'API Gemini
 
     Raises:
+        HTTPException 413: Si l'image décodée dépasse GEMINI_MAX_IMAGE_BYTES
         HTTPException 500: Si GEMINI_API_KEY manquante ou appel échoué
     """
     if not GEMINI_API_KEY:
         raise HTTPException(status_code=500, detail="GEMINI_API_KEY manquante côté serveur")
 
     # Extraire le base64 pur si préfixe data: présent
-    b64 = payload.image_b64
-    if "," in b64:  # Format: data:image/jpeg;base64,/9j/4AAQ...
-        b64 = b64.split(",", 1)[1]
+    b64 = _strip_data_prefix(payload.image_b64)
+    if _decoded_len(b64) > GEMINI_MAX_IMAGE_BYTES:
+        raise HTTPException(status_code=413, detail="Image trop volumineuse pour Gemini")
+
+    # Réponse déjà calculée pour cette image + prompt + modèle ?
+    # Le hachage d'une image de plusieurs Mo est fait dans un thread pour ne
+    # pas bloquer la boucle ; l'accès au cache lui-même reste synchrone
+    digest = await asyncio.to_thread(_image_digest, b64)
+    cache_key = (digest, payload.prompt, GEMINI_MODEL)
+    cached = _GEMINI_CACHE.get(cache_key)
+    if cached is not None:
+        return cached
 
     # Construction du body pour l'API Gemini (format multimodal)
-    body = {
-        "contents": [
-            {
-                "parts": [
-                    {"text": payload.prompt},
-                    {
-                        "inline_data": {
-                            "mime_type": "image/jpeg",
-                            "data": b64,
-                        }
-                    },
-                ]
-            }
-        ]
-    }
-
-    headers = {
-        "Content-Type": "application/json",
-        "x-goog-api-key": GEMINI_API_KEY,
-    }
+    body = {"contents": [_gemini_content(payload.prompt, b64)]}
 
     # Appel asynchrone à l'API Gemini
     try:
-        async with httpx.AsyncClient(timeout=60) as client:
-            resp = await client.post(GEMINI_URL, headers=headers, json=body)
+        resp = await http.post(GEMINI_URL, headers=_gemini_headers(), content=orjson.dumps(body))
     except Exception as exc:
         raise HTTPException(status_code=500, detail=f"Appel Gemini échoué: {exc}") from exc
 
@@ -173,11 +413,11 @@ async def describe_gemini(payload: DescribeRequest) -> dict:
         # Renvoyer l'erreur complète pour diagnostic
         raise HTTPException(status_code=resp.status_code, detail=resp.text)
 
-    data = resp.json()
+    data = orjson.loads(resp.content)
 
     # Extraction du texte depuis la structure de réponse Gemini
-    parts = data.get("candidates", [{}])[0].get("content", {}).get("parts", [])
-    text = " ".join([p.get("text", "") for p in parts if isinstance(p, dict)]).strip()
+    parts = _gemini_parts(data)
+    text = _gemini_text(parts)
 
     # Payload structuré prêt à être transmis à Groq
     structured = {
@@ -186,11 +426,137 @@ async def describe_gemini(payload: DescribeRequest) -> dict:
         "prompt": payload.prompt,
         "model": GEMINI_MODEL,
     }
-    return {"structured": structured, "raw": data}
+    result = {"structured": structured, "raw": data}
+    # Réponse sans texte (prompt bloqué, pas de candidates, finishReason
+    # OTHER/RECITATION...) non mise en cache : un nouvel essai peut réussir
+    if text:
+        _GEMINI_CACHE[cache_key] = result
+    return result
+
+
+@router.post("/describe/gemini/batch")
+async def describe_gemini_batch(
+    payload: GeminiBatchRequest,
+    http: httpx.AsyncClient = Depends(get_http),
+) -> dict:
+    """
+    Soumet un lot d'analyses d'images à Gemini Batch Mode.
+
+    Pour les traitements hors temps réel (analyse différée, annotation de
+    jeux de données) : Gemini traite le lot de manière asynchrone, à coût
+    réduit et sans limite de débit temps réel. Les requêtes sont envoyées
+    en ligne dans le corps (limite Google : ~20 Mo au total). L'analyse
+    temps réel pour l'utilisateur PMR reste sur /describe/gemini.
+
+    Args:
+        payload: Lot de requêtes image + prompt
+        http: Client HTTP partagé (injecté par FastAPI)
+
+    Returns:
+        dict contenant:
+        - job_id: Identifiant à passer à /describe/gemini/batch/{job_id}
+        - state: État initial du job (ex: BATCH_STATE_PENDING)
+
+    Raises:
+        HTTPException 500: Si GEMINI_API_KEY manquante ou appel échoué
+    """
+    if not GEMINI_API_KEY:
+        raise HTTPException(status_code=500, detail="GEMINI_API_KEY manquante côté serveur")
+
+    body = {
+        "batch": {
+            "display_name": payload.display_name,
+            "input_config": {
+                "requests": {
+                    "requests": [
+                        {
+                            "request": {
+                                "contents": [
+                                    _gemini_content(req.prompt, _strip_data_prefix(req.image_b64))
+                                ]
+                            },
+                            "metadata": {"key": f"request-{i}"},
+                        }
+                        for i, req in enumerate(payload.requests)
+                    ]
+                }
+            },
+        }
+    }
+
+    try:
+        resp = await http.post(GEMINI_BATCH_URL, headers=_gemini_headers(), content=orjson.dumps(body))
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=f"Appel Gemini batch échoué: {exc}") from exc
+
+    if resp.status_code != 200:
+        raise HTTPException(status_code=resp.status_code, detail=resp.text)
+
+    data = orjson.loads(resp.content)
+    # Nom retourné par Google : "batches/<id>"
+    job_id = data.get("name", "").removeprefix("batches/")
+    return {"job_id": job_id, "state": data.get("metadata", {}).get("state")}
+
+
+@router.get("/describe/gemini/batch/{job_id}")
+async def describe_gemini_batch_status(
+    job_id: str,
+    http: httpx.AsyncClient = Depends(get_http),
+) -> dict:
+    """
+    Consulte l'état d'un job Gemini Batch et ses résultats une fois terminé.
+
+    Args:
+        job_id: Identifiant renvoyé par /describe/gemini/batch
+        http: Client HTTP partagé (injecté par FastAPI)
+
+    Returns:
+        dict contenant:
+        - job_id: Identifiant du job
+        - state: État du job (BATCH_STATE_PENDING, _RUNNING, _SUCCEEDED...)
+        - done: True quand le job est terminé
+        - results: Si terminé, liste de {key, text, error} dans l'ordre
+                   des requêtes soumises
+
+    Raises:
+        HTTPException 500: Si GEMINI_API_KEY manquante ou appel échoué
+    """
+    if not GEMINI_API_KEY:
+        raise HTTPException(status_code=500, detail="GEMINI_API_KEY manquante côté serveur")
+
+    try:
+        resp = await http.get(f"{GEMINI_BASE_URL}/batches/{job_id}", headers=_gemini_headers())
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=f"Appel Gemini batch échoué: {exc}") from exc
+
+    if resp.status_code != 200:
+        raise HTTPException(status_code=resp.status_code, detail=resp.text)
+
+    data = orjson.loads(resp.content)
+    done = bool(data.get("done"))
+    result = {
+        "job_id": job_id,
+        "state": data.get("metadata", {}).get("state"),
+        "done": done,
+    }
+    if done:
+        inlined = data.get("response", {}).get("inlinedResponses", {}).get("inlinedResponses", [])
+        result["results"] = [
+            {
+                "key": item.get("metadata", {}).get("key"),
+                "text": _gemini_text(_gemini_parts(item.get("response", {}))),
+                "error": item.get("error"),
+            }
+            for item in inlined
+        ]
+    return result
 
 
 @router.post("/describe/groq")
-async def describe_groq(payload: GroqRequest) -> dict:
+async def describe_groq(
+    payload: GroqRequest,
+    http: httpx.AsyncClient = Depends(get_http),
+) -> dict:
     """
     Génère des recommandations personnalisées via Groq LLM.
 
@@ -200,6 +566,7 @@ async def describe_groq(payload: GroqRequest) -> dict:
 
     Args:
         payload: Requête contenant la description et le profil utilisateur
+        http: Client HTTP partagé (injecté par FastAPI)
 
     Returns:
         dict contenant:
@@ -213,49 +580,27 @@ async def describe_groq(payload: GroqRequest) -> dict:
     if not GROQ_API_KEY:
         raise HTTPException(status_code=500, detail="GROQ_API_KEY manquante côté serveur")
 
-    # Priorité au profil envoyé par le client, sinon utiliser le catalogue
-    profile_data = payload.profile_override or _PROFILES.get(payload.profile) or _PROFILES.get("default", {})
+    user_prompt = _groq_user_prompt(payload)
 
-    # Prompt système définissant le comportement de l'assistant
-    system_prompt = (
-        "Tu es un assistant de sécurité pour la mobilité PMR. "
-        "Réponds STRICTEMENT en JSON sans texte hors JSON. "
-        "Inclue des risques potentiels et des actions/recommandations courtes."
-    )
-
-    # Prompt utilisateur avec contexte complet
-    user_prompt = (
-        f"Profil: {payload.profile}\n"
-        f"Données profil: {json.dumps(profile_data, ensure_ascii=False)}\n"
-        f"Description:\n{payload.description}\n"
-        f"Consigne de sortie: {payload.instruction}"
-    )
-
-    # Construction du body pour l'API Groq (format OpenAI-compatible)
-    body = {
-        "model": GROQ_MODEL,
-        "messages": [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt},
-        ],
-        "temperature": 0.2,  # Basse température pour réponses cohérentes
-    }
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {GROQ_API_KEY}",
-    }
+    # Le prompt utilisateur regroupe profil, données profil, description et
+    # consigne : son empreinte identifie la requête (overrides compris)
+    cache_key = (hashlib.sha256(user_prompt.encode()).digest(), GROQ_MODEL)
+    cached = _GROQ_CACHE.get(cache_key)
+    if cached is not None:
+        return cached
 
     # Appel asynchrone à l'API Groq
     try:
-        async with httpx.AsyncClient(timeout=60) as client:
-            resp = await client.post(GROQ_URL, headers=headers, json=body)
+        resp = await http.post(
+            GROQ_URL, headers=_groq_headers(), content=orjson.dumps(_groq_body(user_prompt))
+        )
     except Exception as exc:
         raise HTTPException(status_code=500, detail=f"Appel Groq échoué: {exc}") from exc
 
     if resp.status_code != 200:
         raise HTTPException(status_code=resp.status_code, detail=resp.text)
 
-    data = resp.json()
+    data = orjson.loads(resp.content)
 
     # Extraction du contenu de la réponse
     content = data.get("choices", [{}])[0].get("message", {}).get("content", "")
@@ -263,8 +608,110 @@ async def describe_groq(payload: GroqRequest) -> dict:
     # Tentative de parsing JSON du contenu
     parsed = None
     try:
-        parsed = json.loads(content)
+        parsed = orjson.loads(content)
     except Exception:
         parsed = None  # Le contenu n'est pas du JSON valide
 
-    return {"structured": parsed, "raw_text": content, "raw": data}
+    result = {"structured": parsed, "raw_text": content, "raw": data}
+    # Une réponse non JSON n'est pas mise en cache : un nouvel essai peut réussir
+    if parsed is not None:
+        _GROQ_CACHE[cache_key] = result
+    return result
+
+
+@router.post("/describe/groq/stream")
+async def describe_groq_stream(
+    payload: GroqRequest,
+    http: httpx.AsyncClient = Depends(get_http),
+) -> StreamingResponse:
+    """
+    Variante streamée de /describe/groq (Server-Sent Events).
+
+    Relaie au client les événements SSE de Groq au fil de la génération
+    (format OpenAI : lignes "data: {...}" puis "data: [DONE]"). Le premier
+    risque peut ainsi être lu à voix haute avant la fin de la réponse.
+    Pas de cache ni de parsing JSON : utiliser /describe/groq pour obtenir
+    directement le JSON structuré.
+
+    Args:
+        payload: Requête contenant la description et le profil utilisateur
+        http: Client HTTP partagé (injecté par FastAPI)
+
+    Returns:
+        StreamingResponse text/event-stream
+
+    Raises:
+        HTTPException 500: Si GROQ_API_KEY manquante ou appel échoué
+    """
+    if not GROQ_API_KEY:
+        raise HTTPException(status_code=500, detail="GROQ_API_KEY manquante côté serveur")
+
+    # identity : les octets bruts relayés tels quels sont déjà décodés
+    request = http.build_request(
+        "POST",
+        GROQ_URL,
+        headers={**_groq_headers(), "Accept-Encoding": "identity"},
+        content=orjson.dumps(_groq_body(_groq_user_prompt(payload), stream=True)),
+    )
+    try:
+        resp = await http.send(request, stream=True)
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=f"Appel Groq échoué: {exc}") from exc
+
+    # Erreur levée avant l'envoi des headers : le client reçoit le vrai statut
+    if resp.status_code != 200:
+        detail = (await resp.aread()).decode(errors="replace")
+        await resp.aclose()
+        raise HTTPException(status_code=resp.status_code, detail=detail)
+
+    # La tâche de fond est exécutée après la réponse même si le client se
+    # déconnecte avant la lecture du corps : la connexion retourne au pool
+    return StreamingResponse(
+        resp.aiter_raw(),
+        media_type="text/event-stream",
+        background=BackgroundTask(resp.aclose),
+    )
+
+
+@router.post("/describe/chain")
+async def describe_chain(
+    payload: ChainRequest,
+    http: httpx.AsyncClient = Depends(get_http),
+) -> dict:
+    """
+    Enchaîne l'analyse Gemini et les recommandations Groq en un seul appel.
+
+    Évite au client un aller-retour complet (réception de la sortie Gemini
+    puis renvoi vers /describe/groq) : la description est passée à Groq
+    directement côté serveur, avec le même client HTTP et les mêmes caches
+    que les endpoints individuels.
+
+    Args:
+        payload: Image, prompt et paramètres de profil
+        http: Client HTTP partagé (injecté par FastAPI)
+
+    Returns:
+        dict contenant:
+        - description: Texte de la scène produit par Gemini
+        - structured: JSON parsé avec summary, risks, actions (si valide)
+        - raw_text: Texte brut retourné par Groq
+
+    Raises:
+        HTTPException: Erreurs de /describe/gemini ou /describe/groq
+    """
+    gemini = await describe_gemini(payload, http)
+    description = gemini["structured"]["text"]
+    groq = await describe_groq(
+        GroqRequest(
+            description=description,
+            profile=payload.profile,
+            instruction=payload.instruction,
+            profile_override=payload.profile_override,
+        ),
+        http,
+    )
+    return {
+        "description": description,
+        "structured": groq["structured"],
+        "raw_text": groq["raw_text"],
+    }
@@ -10,10 +10,11 @@ Les détections proviennent généralement du modèle COCO-SSD côté client
 et sont enrichies avec des informations contextuelles pour l'assistance PMR.
 """
 
+from functools import lru_cache
 from typing import Dict, List, Optional
 
 from fastapi import APIRouter
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 
 router = APIRouter()
@@ -35,7 +36,11 @@ class Detection(BaseModel):
         side: Position latérale (left, center, right)
         ocr: Texte extrait par OCR si disponible
         context: Contexte additionnel (retail, restaurant, etc.)
+
+    Immuable (frozen) : une détection n'est jamais modifiée après validation.
     """
+    model_config = ConfigDict(frozen=True, extra="ignore")
+
     class_name: str = Field(..., alias="class")
     score: float = Field(..., ge=0.0, le=1.0)
     zone: Optional[str] = Field(None, description="near|mid|far")
@@ -67,7 +72,12 @@ class EnrichResponse(BaseModel):
         class_name: Classe d'origine pour référence
         zone: Zone de profondeur pour référence
         side: Position latérale pour référence
+
+    Immuable (frozen) : les instances produites par describe_detection sont
+    mises en cache et partagées entre les requêtes.
     """
+    model_config = ConfigDict(frozen=True)
+
     summary: str
     attributes: Dict[str, str] = {}
     risks: List[str] = []
@@ -143,6 +153,23 @@ RESTAURANT_DESCRIPTIONS = {
     "dish": "Plat servi"
 }
 
+# Table unique de recherche : en cas de doublon, la priorité est
+# obstacles > retail > restaurant (les derniers fusionnés l'emportent)
+_ALL_DESCRIPTIONS = {
+    **RESTAURANT_DESCRIPTIONS,
+    **RETAIL_DESCRIPTIONS,
+    **OBSTACLE_DESCRIPTIONS,
+}
+
+# Classes d'obstacles potentiellement dangereuses pour un PMR
+_RISK_CLASSES = frozenset({"person", "crowd", "stairs", "curb", "cone", "barrier", "puddle"})
+
+# Risques spécifiques ajoutés selon le type d'obstacle
+_EXTRA_RISKS = {
+    "puddle": "Risque de glissade",
+    "stairs": "Prévoir montée/descente",
+}
+
 
 # ============================================================================
 # Fonctions de traitement
@@ -157,54 +184,89 @@ def describe_detection(det: Detection) -> EnrichResponse:
     2. Évalue les risques selon le type d'objet et sa position
     3. Compile les attributs pertinents
 
+    Le calcul ne dépend que des champs de la détection (score arrondi à
+    2 décimales) : il est mémoïsé par _describe_cached. L'EnrichResponse
+    renvoyée est partagée entre les appels et ne doit pas être modifiée.
+
     Args:
         det: Détection à enrichir
 
     Returns:
         EnrichResponse avec description, attributs et risques
     """
-    cls = det.class_name.lower()
-
-    # Recherche de la description dans les dictionnaires par priorité
-    if cls in OBSTACLE_DESCRIPTIONS:
-        summary = OBSTACLE_DESCRIPTIONS[cls]
-    elif cls in RETAIL_DESCRIPTIONS:
-        summary = RETAIL_DESCRIPTIONS[cls]
-    elif cls in RESTAURANT_DESCRIPTIONS:
-        summary = RESTAURANT_DESCRIPTIONS[cls]
-    else:
-        summary = f"Objet {det.class_name}"  # Fallback générique
+    return _describe_cached(
+        det.class_name, det.zone, det.side, f"{det.score:.2f}", det.ocr, det.context
+    )
+
+
+def _describe_dict(det: Detection) -> dict:
+    """
+    Variante de describe_detection renvoyant un dict prêt à sérialiser.
+
+    Utilisée par /enrich/batch pour éviter la conversion modèle -> dict
+    de chaque élément. Le dict est mis en cache : ne pas le modifier.
+
+    Args:
+        det: Détection à enrichir
+
+    Returns:
+        dict de même structure qu'EnrichResponse
+    """
+    return _describe_dict_cached(
+        det.class_name, det.zone, det.side, f"{det.score:.2f}", det.ocr, det.context
+    )
+
+
+@lru_cache(maxsize=4096)
+def _describe_dict_cached(*key) -> dict:
+    """Sérialisation mise en cache de _describe_cached pour une même clé."""
+    return _describe_cached(*key).model_dump()
+
+
+@lru_cache(maxsize=4096)
+def _describe_cached(
+    class_name: str,
+    zone: Optional[str],
+    side: Optional[str],
+    score: str,
+    ocr: Optional[str],
+    context: Optional[str],
+) -> EnrichResponse:
+    """Calcul effectif de describe_detection, mis en cache par clé de champs."""
+    cls = class_name.lower()
+
+    # Recherche de la description (fallback générique si classe inconnue)
+    summary = _ALL_DESCRIPTIONS.get(cls) or f"Objet {class_name}"
 
     # Évaluation des risques pour les objets potentiellement dangereux
     risks: List[str] = []
-    if cls in {"person", "crowd", "stairs", "curb", "cone", "barrier", "puddle"}:
+    if cls in _RISK_CLASSES:
         # Risque accru si l'obstacle est proche
-        if det.zone == "near":
+        if zone == "near":
             risks.append("Obstacle proche")
         # Risques spécifiques par type d'obstacle
-        if cls == "puddle":
-            risks.append("Risque de glissade")
-        if cls == "stairs":
-            risks.append("Prévoir montée/descente")
+        extra = _EXTRA_RISKS.get(cls)
+        if extra:
+            risks.append(extra)
 
     # Compilation des attributs
     attrs: Dict[str, str] = {
-        "zone": det.zone or "unknown",
-        "side": det.side or "unknown",
-        "score": f"{det.score:.2f}"
+        "zone": zone or "unknown",
+        "side": side or "unknown",
+        "score": score
     }
-    if det.ocr:
-        attrs["ocr"] = det.ocr
-    if det.context:
-        attrs["context"] = det.context
+    if ocr:
+        attrs["ocr"] = ocr
+    if context:
+        attrs["context"] = context
 
     return EnrichResponse(
         summary=summary,
         attributes=attrs,
         risks=risks,
-        class_name=det.class_name,
-        zone=det.zone,
-        side=det.side
+        class_name=class_name,
+        zone=zone,
+        side=side
     )
 
 
@@ -226,20 +288,29 @@ def enrich_detection(payload: EnrichRequest) -> EnrichResponse:
     return describe_detection(payload.detection)
 
 
-@router.post("/enrich/batch", response_model=List[EnrichResponse])
-def enrich_batch(payload: EnrichBatchRequest) -> List[EnrichResponse]:
+@router.post(
+    "/enrich/batch",
+    response_model=None,
+    responses={200: {"model": List[EnrichResponse]}},
+)
+def enrich_batch(payload: EnrichBatchRequest) -> List[dict]:
     """
     Enrichit un lot de détections en une seule requête.
 
     Utile pour traiter toutes les détections d'une frame en une fois.
 
+    Endpoint chaud (appelé à chaque frame) : la réponse n'est pas
+    revalidée par Pydantic (response_model=None) et les dicts sont
+    construits directement. Le schéma reste documenté dans OpenAPI,
+    mais la cohérence avec EnrichResponse repose sur _describe_dict.
+
     Args:
         payload: Requête contenant la liste des détections
 
     Returns:
-        Liste d'EnrichResponse pour chaque détection
+        Liste de dicts au format EnrichResponse pour chaque détection
     """
-    return [describe_detection(det) for det in payload.detections]
+    return [_describe_dict(det) for det in payload.detections]
 
 
 @router.post("/advise", response_model=AdviceResponse)
@@ -265,20 +336,16 @@ def advise(payload: AdviceRequest) -> AdviceResponse:
     Returns:
         AdviceResponse avec priorité, canaux et messages
     """
-    messages: List[str] = []
-    priority = "info"
-
     # Analyse des détections pour obstacles proches
-    for det in payload.detections:
-        if det.zone == "near":
-            priority = "high"
-            side = det.side or "devant"
-            messages.append(f"Obstacle {det.class_name} {side}, ralentir")
+    messages: List[str] = [
+        f"Obstacle {det.class_name} {det.side or 'devant'}, ralentir"
+        for det in payload.detections
+        if det.zone == "near"
+    ]
+    priority = "high" if messages else "info"
 
     # Compilation des risques depuis les enrichissements
-    for enr in payload.enrichments:
-        for risk in enr.risks:
-            messages.append(f"{enr.summary}: {risk}")
+    messages += [f"{enr.summary}: {risk}" for enr in payload.enrichments for risk in enr.risks]
 
     # Message par défaut si aucun obstacle critique
     if not messages:
@@ -3,6 +3,7 @@ Module principal de l'API Vision360.
 
 Ce module configure et initialise l'application FastAPI, incluant :
 - Le chargement des variables d'environnement
+- Le client HTTP partagé (cycle de vie via lifespan)
 - La configuration du middleware CORS
 - L'enregistrement des routes (guidance, describe)
 
@@ -10,12 +11,14 @@ L'API sert de passerelle entre les applications clientes (mobile, web)
 et les services d'IA externes (Gemini, Groq).
 """
 
+import asyncio
 import os
+from contextlib import asynccontextmanager
 from pathlib import Path
 
+import httpx
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
 
 
 def _load_env_file():
@@ -55,17 +58,81 @@ _load_env_file()
 
 # Import des routers après le chargement des variables d'environnement
 from .guidance import router as guidance_router
-from .describe import router as describe_router
+from .describe import GEMINI_URL, GROQ_URL, router as describe_router
+
+
+async def _prewarm(client: httpx.AsyncClient) -> None:
+    """
+    Ouvre à l'avance les connexions TLS vers Gemini et Groq.
+
+    Envoie une requête HEAD légère à chaque API pour peupler le pool de
+    connexions : la première vraie requête utilisateur évite ainsi le coût
+    du handshake TCP+TLS. Le code de statut renvoyé est ignoré, et les
+    erreurs réseau (hors ligne, DNS...) n'empêchent pas le démarrage.
+
+    Désactivable avec HTTPX_PREWARM=0 (tests, environnements sans réseau).
+
+    Args:
+        client: Client HTTP partagé à préchauffer
+    """
+    if os.getenv("HTTPX_PREWARM", "1") == "0":
+        return
+    await asyncio.gather(
+        client.head(GEMINI_URL, timeout=5.0),
+        client.head(GROQ_URL, timeout=5.0),
+        return_exceptions=True,
+    )
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Gère le cycle de vie de l'application (démarrage / arrêt).
+
+    Crée un unique httpx.AsyncClient partagé par les endpoints Gemini et
+    Groq (via la dépendance get_http). Les connexions TCP/TLS restent
+    ouvertes entre les requêtes (keep-alive) au lieu d'être renégociées
+    à chaque appel. HTTP/2 est activé pour multiplexer plusieurs requêtes
+    simultanées sur une même connexion. Le client est fermé proprement à
+    l'arrêt du serveur.
+
+    La taille du pool est réglable par variables d'environnement :
+    - HTTPX_MAX_CONNECTIONS : connexions simultanées max (défaut 200)
+    - HTTPX_MAX_KEEPALIVE : connexions gardées ouvertes au repos (défaut 50)
+    - HTTPX_KEEPALIVE_EXPIRY : durée de vie d'une connexion inactive en s (défaut 30)
+
+    Args:
+        app: Application FastAPI en cours de démarrage
+    """
+    limits = httpx.Limits(
+        max_connections=int(os.getenv("HTTPX_MAX_CONNECTIONS", "200")),
+        max_keepalive_connections=int(os.getenv("HTTPX_MAX_KEEPALIVE", "50")),
+        keepalive_expiry=float(os.getenv("HTTPX_KEEPALIVE_EXPIRY", "30")),
+    )
+    app.state.http = httpx.AsyncClient(
+        timeout=httpx.Timeout(60.0),
+        limits=limits,
+        http2=True,
+    )
+    await _prewarm(app.state.http)
+    try:
+        yield
+    finally:
+        await app.state.http.aclose()
+
 
 # Création de l'application FastAPI avec métadonnées
 app = FastAPI(
     title="Vision360 API",
     description="API d'assistance IA pour personnes à mobilité réduite",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # Configuration CORS permissive pour le développement
 # Permet à toutes les origines d'accéder à l'API
+# Gère aussi les requêtes preflight (OPTIONS) : aucun middleware CORS
+# supplémentaire n'est nécessaire
 # Note: À restreindre en production avec les domaines autorisés
 app.add_middleware(
     CORSMiddleware,
@@ -79,50 +146,6 @@ app.add_middleware(
 )
 
 
-@app.middleware("http")
-async def add_cors_headers(request, call_next):
-    """
-    Middleware HTTP ajoutant les headers CORS à toutes les réponses.
-
-    Gère spécifiquement les requêtes OPTIONS (preflight) en retournant
-    une réponse vide avec les headers CORS appropriés.
-
-    Ce middleware agit en complément du CORSMiddleware standard pour
-    garantir que les headers sont présents dans tous les cas.
-
-    Args:
-        request: Requête HTTP entrante
-        call_next: Fonction pour passer au middleware suivant
-
-    Returns:
-        JSONResponse pour OPTIONS, ou réponse enrichie de headers CORS
-    """
-    # Gestion des requêtes preflight (OPTIONS)
-    if request.method == "OPTIONS":
-        return JSONResponse(
-            status_code=200,
-            content={"status": "ok"},
-            headers={
-                "Access-Control-Allow-Origin": "*",
-                "Access-Control-Allow-Methods": "GET,POST,PUT,DELETE,OPTIONS",
-                "Access-Control-Allow-Headers": "*",
-                "Access-Control-Expose-Headers": "*",
-                "Access-Control-Max-Age": "86400",
-            },
-        )
-
-    # Exécuter la requête normale
-    response = await call_next(request)
-
-    # Ajouter les headers CORS si non présents
-    response.headers.setdefault("Access-Control-Allow-Origin", "*")
-    response.headers.setdefault("Access-Control-Allow-Methods", "GET,POST,PUT,DELETE,OPTIONS")
-    response.headers.setdefault("Access-Control-Allow-Headers", "*")
-    response.headers.setdefault("Access-Control-Expose-Headers", "*")
-    response.headers.setdefault("Access-Control-Max-Age", "86400")
-    return response
-
-
 @app.get("/health")
 def health():
     """
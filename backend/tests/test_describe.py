@@ -0,0 +1,309 @@
+import asyncio
+import base64
+import json
+import os
+
+import httpx
+from fastapi.testclient import TestClient
+
+from app import describe
+from app.main import _prewarm, app
+
+
+def _client_with(handler):
+    """TestClient dont le client HTTP partagé est branché sur un MockTransport."""
+    http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    app.dependency_overrides[describe.get_http] = lambda: http
+    return TestClient(app)
+
+
+class _UpstreamStream(httpx.AsyncByteStream):
+    """Corps streamé comme sur le réseau (content=bytes serait lu d'avance)."""
+
+    def __init__(self, data: bytes):
+        self._data = data
+
+    async def __aiter__(self):
+        yield self._data
+
+
+def teardown_function():
+    app.dependency_overrides.clear()
+    describe._GEMINI_CACHE.clear()
+    describe._GROQ_CACHE.clear()
+
+
+def test_lifespan_creates_and_closes_shared_client(monkeypatch):
+    monkeypatch.setenv("HTTPX_PREWARM", "0")
+    with TestClient(app) as client:
+        http = client.app.state.http
+        assert isinstance(http, httpx.AsyncClient)
+        assert not http.is_closed
+    assert http.is_closed
+
+
+def test_prewarm_hits_both_hosts_and_ignores_errors(monkeypatch):
+    monkeypatch.setenv("HTTPX_PREWARM", "1")
+    hosts = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        hosts.append(request.url.host)
+        if request.url.host == "api.groq.com":
+            raise httpx.ConnectError("offline")
+        return httpx.Response(405)
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as http:
+            await _prewarm(http)
+
+    asyncio.run(run())
+    assert sorted(hosts) == ["api.groq.com", "generativelanguage.googleapis.com"]
+
+
+def test_gemini_uses_shared_client(monkeypatch):
+    monkeypatch.setattr(describe, "GEMINI_API_KEY", "test-key")
+    seen = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request)
+        return httpx.Response(200, json={
+            "candidates": [{"content": {"parts": [{"text": "Un escalier"}]}}],
+        })
+
+    client = _client_with(handler)
+    r = client.post("/api/describe/gemini", json={"image_b64": "data:image/jpeg;base64,AAAA"})
+    assert r.status_code == 200
+    assert r.json()["structured"]["text"] == "Un escalier"
+    assert seen[0].headers["x-goog-api-key"] == "test-key"
+    sent = json.loads(seen[0].content)
+    assert sent["contents"][0]["parts"][1]["inline_data"]["data"] == "AAAA"
+
+
+def test_gemini_repeated_frame_is_served_from_cache(monkeypatch):
+    monkeypatch.setattr(describe, "GEMINI_API_KEY", "test-key")
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return httpx.Response(200, json={
+            "candidates": [{"content": {"parts": [{"text": "Un rayon"}]}}],
+        })
+
+    client = _client_with(handler)
+    body = {"image_b64": "BBBB"}
+    first = client.post("/api/describe/gemini", json=body)
+    second = client.post("/api/describe/gemini", json=body)
+    other = client.post("/api/describe/gemini", json={**body, "prompt": "Autre"})
+    assert first.json() == second.json()
+    assert other.status_code == 200
+    assert len(calls) == 2
+
+
+def test_decoded_len_matches_real_decode():
+    for raw in (b"", b"a", b"ab", b"abc", b"abcd" * 10):
+        assert describe._decoded_len(base64.b64encode(raw).decode()) == len(raw)
+
+
+def test_gemini_rejects_oversized_image(monkeypatch):
+    monkeypatch.setattr(describe, "GEMINI_API_KEY", "test-key")
+    monkeypatch.setattr(describe, "GEMINI_MAX_IMAGE_BYTES", 3)
+    client = _client_with(lambda request: httpx.Response(500))
+    r = client.post("/api/describe/gemini", json={"image_b64": "QUJDRA=="})
+    assert r.status_code == 413
+
+
+def test_gemini_batch_submit_and_poll(monkeypatch):
+    monkeypatch.setattr(describe, "GEMINI_API_KEY", "test-key")
+    submitted = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.method == "POST":
+            submitted.append(json.loads(request.content))
+            return httpx.Response(200, json={
+                "name": "batches/abc123", "metadata": {"state": "BATCH_STATE_PENDING"},
+            })
+        assert request.url.path.endswith("/batches/abc123")
+        return httpx.Response(200, json={
+            "done": True,
+            "metadata": {"state": "BATCH_STATE_SUCCEEDED"},
+            "response": {"inlinedResponses": {"inlinedResponses": [{
+                "metadata": {"key": "request-0"},
+                "response": {"candidates": [{"content": {"parts": [{"text": "Une porte"}]}}]},
+            }]}},
+        })
+
+    client = _client_with(handler)
+    r = client.post("/api/describe/gemini/batch", json={
+        "requests": [{"image_b64": "data:image/jpeg;base64,CCCC"}],
+    })
+    assert r.json() == {"job_id": "abc123", "state": "BATCH_STATE_PENDING"}
+    req = submitted[0]["batch"]["input_config"]["requests"]["requests"][0]
+    assert req["metadata"] == {"key": "request-0"}
+    assert req["request"]["contents"][0]["parts"][1]["inline_data"]["data"] == "CCCC"
+
+    r = client.get("/api/describe/gemini/batch/abc123")
+    assert r.json() == {
+        "job_id": "abc123",
+        "state": "BATCH_STATE_SUCCEEDED",
+        "done": True,
+        "results": [{"key": "request-0", "text": "Une porte", "error": None}],
+    }
+
+
+def test_groq_parses_json_content(monkeypatch):
+    monkeypatch.setattr(describe, "GROQ_API_KEY", "test-key")
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json={
+            "choices": [{"message": {"content": '{"summary": "ok", "risks": [], "actions": []}'}}],
+        })
+
+    client = _client_with(handler)
+    r = client.post("/api/describe/groq", json={"description": "Rayon snacks"})
+    assert r.status_code == 200
+    assert r.json()["structured"] == {"summary": "ok", "risks": [], "actions": []}
+
+
+def test_groq_cache_distinguishes_profile_override(monkeypatch):
+    monkeypatch.setattr(describe, "GROQ_API_KEY", "test-key")
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return httpx.Response(200, json={"choices": [{"message": {"content": "{}"}}]})
+
+    client = _client_with(handler)
+    body = {"description": "Rayon snacks"}
+    client.post("/api/describe/groq", json=body)
+    client.post("/api/describe/groq", json=body)
+    client.post("/api/describe/groq", json={**body, "profile_override": {"allergies": ["arachide"]}})
+    assert len(calls) == 2
+
+
+def test_gemini_empty_answer_is_not_cached(monkeypatch):
+    monkeypatch.setattr(describe, "GEMINI_API_KEY", "test-key")
+    answers = [
+        {"promptFeedback": {"blockReason": "OTHER"}},
+        {"candidates": [{"finishReason": "RECITATION"}]},
+        {"candidates": [{"content": {"parts": [{"text": "Un rayon"}]}}]},
+    ]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json=answers.pop(0))
+
+    client = _client_with(handler)
+    body = {"image_b64": "EEEE"}
+    assert client.post("/api/describe/gemini", json=body).json()["structured"]["text"] == ""
+    assert client.post("/api/describe/gemini", json=body).json()["structured"]["text"] == ""
+    assert client.post("/api/describe/gemini", json=body).json()["structured"]["text"] == "Un rayon"
+    assert client.post("/api/describe/gemini", json=body).json()["structured"]["text"] == "Un rayon"
+    assert answers == []
+
+
+def test_groq_malformed_answer_is_not_cached(monkeypatch):
+    monkeypatch.setattr(describe, "GROQ_API_KEY", "test-key")
+    answers = ["Désolé, voici le résumé", '{"summary": "ok", "risks": [], "actions": []}']
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json={"choices": [{"message": {"content": answers.pop(0)}}]})
+
+    client = _client_with(handler)
+    body = {"description": "Rayon snacks"}
+    assert client.post("/api/describe/groq", json=body).json()["structured"] is None
+    assert client.post("/api/describe/groq", json=body).json()["structured"]["summary"] == "ok"
+    assert client.post("/api/describe/groq", json=body).json()["structured"]["summary"] == "ok"
+    assert answers == []
+
+
+def test_profiles_reload_when_file_changes(monkeypatch, tmp_path):
+    path = tmp_path / "user_profiles.json"
+    path.write_text('{"default": {"notes": "v1"}}', encoding="utf-8")
+    monkeypatch.setattr(describe, "PROFILE_PATH", path)
+
+    profiles, _ = describe._load_profiles()
+    assert profiles["default"]["notes"] == "v1"
+
+    path.write_text('{"default": {"notes": "v2"}}', encoding="utf-8")
+    os.utime(path, ns=(1, 1))
+    profiles, jsons = describe._load_profiles()
+    assert profiles["default"]["notes"] == "v2"
+    assert jsons["default"] == '{"notes": "v2"}'
+
+    path.write_text("{invalide", encoding="utf-8")
+    os.utime(path, ns=(2, 2))
+    profiles, _ = describe._load_profiles()
+    assert profiles["default"]["notes"] == "v2"
+
+
+def test_chain_runs_gemini_then_groq(monkeypatch):
+    monkeypatch.setattr(describe, "GEMINI_API_KEY", "test-key")
+    monkeypatch.setattr(describe, "GROQ_API_KEY", "test-key")
+    groq_prompts = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.host == "generativelanguage.googleapis.com":
+            return httpx.Response(200, json={
+                "candidates": [{"content": {"parts": [{"text": "Escalier sans rampe"}]}}],
+            })
+        groq_prompts.append(json.loads(request.content)["messages"][1]["content"])
+        return httpx.Response(200, json={
+            "choices": [{"message": {"content": '{"summary": "Escalier", "risks": [], "actions": []}'}}],
+        })
+
+    client = _client_with(handler)
+    r = client.post("/api/describe/chain", json={"image_b64": "DDDD", "profile": "wheelchair_diabetic"})
+    assert r.status_code == 200
+    assert r.json()["description"] == "Escalier sans rampe"
+    assert r.json()["structured"]["summary"] == "Escalier"
+    assert "Profil: wheelchair_diabetic" in groq_prompts[0]
+    assert "Escalier sans rampe" in groq_prompts[0]
+
+
+def test_groq_stream_relays_sse_events(monkeypatch):
+    monkeypatch.setattr(describe, "GROQ_API_KEY", "test-key")
+    events = (
+        b'data: {"choices": [{"delta": {"content": "{\\"summary\\""}}]}\n\n'
+        b"data: [DONE]\n\n"
+    )
+    bodies = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        bodies.append(json.loads(request.content))
+        return httpx.Response(200, stream=_UpstreamStream(events), headers={"Content-Type": "text/event-stream"})
+
+    client = _client_with(handler)
+    r = client.post("/api/describe/groq/stream", json={"description": "Rayon snacks"})
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/event-stream")
+    assert r.content == events
+    assert bodies[0]["stream"] is True
+
+
+def test_groq_stream_closes_upstream_without_reading_body(monkeypatch):
+    monkeypatch.setattr(describe, "GROQ_API_KEY", "test-key")
+    upstream = []
+
+    async def keep(response: httpx.Response) -> None:
+        upstream.append(response)
+
+    async def run():
+        transport = httpx.MockTransport(
+            lambda request: httpx.Response(200, stream=_UpstreamStream(b"data: [DONE]\n\n"))
+        )
+        async with httpx.AsyncClient(transport=transport, event_hooks={"response": [keep]}) as http:
+            response = await describe.describe_groq_stream(describe.GroqRequest(description="Rayon"), http)
+            assert not upstream[0].is_closed
+            # Client déconnecté : le corps n'est jamais itéré, seule la tâche de fond tourne
+            await response.background()
+
+    asyncio.run(run())
+    assert upstream[0].is_closed
+    assert upstream[0].request.headers["accept-encoding"] == "identity"
+
+
+def test_groq_stream_propagates_upstream_error(monkeypatch):
+    monkeypatch.setattr(describe, "GROQ_API_KEY", "test-key")
+    client = _client_with(lambda request: httpx.Response(429, text="rate limited"))
+    r = client.post("/api/describe/groq/stream", json={"description": "Rayon snacks"})
+    assert r.status_code == 429
+    assert r.json()["detail"] == "rate limited"
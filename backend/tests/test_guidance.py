@@ -0,0 +1,61 @@
+import pytest
+from fastapi.testclient import TestClient
+from pydantic import ValidationError
+
+from app.guidance import Detection, describe_detection
+from app.main import app
+
+client = TestClient(app)
+
+
+def test_enrich_stairs_near():
+    r = client.post("/api/guidance/enrich", json={
+        "detection": {"class": "stairs", "score": 0.92, "zone": "near", "side": "center"},
+    })
+    assert r.status_code == 200
+    assert r.json() == {
+        "summary": "Escalier",
+        "attributes": {"zone": "near", "side": "center", "score": "0.92"},
+        "risks": ["Obstacle proche", "Prévoir montée/descente"],
+        "class_name": "stairs",
+        "zone": "near",
+        "side": "center",
+    }
+
+
+def test_enrich_batch_unknown_class_and_extras():
+    r = client.post("/api/guidance/enrich/batch", json={"detections": [
+        {"class": "Puddle", "score": 0.5, "zone": "far"},
+        {"class": "Robot", "score": 0.333, "ocr": "PROMO", "context": "retail"},
+    ]})
+    assert r.status_code == 200
+    puddle, robot = r.json()
+    assert puddle["summary"] == "Zone glissante"
+    assert puddle["risks"] == ["Risque de glissade"]
+    assert robot["summary"] == "Objet Robot"
+    assert robot["attributes"] == {
+        "zone": "unknown", "side": "unknown", "score": "0.33", "ocr": "PROMO", "context": "retail",
+    }
+
+
+def test_describe_detection_is_memoized():
+    det = Detection(**{"class": "cone", "score": 0.8, "zone": "near"})
+    enr = describe_detection(det)
+    assert enr is describe_detection(det)
+    with pytest.raises(ValidationError):
+        enr.summary = "modifié"
+
+
+def test_advise_near_obstacle_is_high_priority():
+    r = client.post("/api/guidance/advise", json={
+        "profile": "wheelchair",
+        "context": "supermarket",
+        "detections": [{"class": "person", "score": 0.9, "zone": "near", "side": "left"}],
+        "enrichments": [{"summary": "Escalier", "risks": ["Prévoir montée/descente"]}],
+    })
+    assert r.status_code == 200
+    assert r.json() == {
+        "priority": "high",
+        "channel": ["voice", "haptic"],
+        "messages": ["Obstacle person left, ralentir", "Escalier: Prévoir montée/descente"],
+    }
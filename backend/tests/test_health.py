@@ -7,3 +7,20 @@ def test_health_endpoint_returns_ok():
     r = client.get("/health")
     assert r.status_code == 200
     assert r.json() == {"status": "ok"}
+
+
+def test_cors_preflight_is_handled_by_middleware():
+    r = client.options("/api/guidance/enrich", headers={
+        "Origin": "http://localhost:3000",
+        "Access-Control-Request-Method": "POST",
+        "Access-Control-Request-Headers": "content-type",
+    })
+    assert r.status_code == 200
+    assert r.headers["access-control-allow-origin"] == "*"
+    assert r.headers["access-control-max-age"] == "86400"
+    assert "POST" in r.headers["access-control-allow-methods"]
+
+
+def test_cors_headers_on_simple_request():
+    r = client.get("/health", headers={"Origin": "http://localhost:3000"})
+    assert r.headers["access-control-allow-origin"] == "*"
@@ -2,8 +2,20 @@
 """Merge multiple YOLO-format datasets into one (images/labels/train|val)."""
 
 import argparse
+import errno
+import os
 import shutil
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Tuple
+
+try:
+    import fcntl  # POSIX only, used for reflinks
+except ImportError:
+    fcntl = None
+
+FICLONE = 0x40049409  # Linux ioctl: share extents (btrfs, XFS, ...)
 
 
 def parse_args():
@@ -14,22 +26,124 @@ def parse_args():
                    help="Output directory (created if missing)")
     p.add_argument("--split", default="train", choices=["train", "val", "test"],
                    help="Which split to merge (expects images/<split> and labels/<split>)")
+    p.add_argument("--mode", default="link", choices=["link", "reflink", "copy"],
+                   help="How files are placed: hardlink (default), reflink (copy-on-write) "
+                        "or full copy. Falls back to copy when unsupported")
+    p.add_argument("--workers", type=int, default=min(32, (os.cpu_count() or 1) * 4),
+                   help="Number of files placed concurrently (I/O bound)")
     return p.parse_args()
 
 
-def copy_tree(src: Path, dst: Path) -> int:
-    dst.mkdir(parents=True, exist_ok=True)
-    count = 0
-    for file in src.glob("*"):
-        if file.is_dir():
+def _reflink(src: str, target: str) -> None:
+    """Clone src into target sharing its data blocks (copy-on-write)."""
+    if fcntl is None:
+        raise OSError("reflink not supported on this platform")
+    with open(src, "rb") as s, open(target, "wb") as d:
+        fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+    shutil.copystat(src, target)
+
+
+def _copy_in_kernel(src: str, target: str) -> None:
+    """Copy src into target with copy_file_range (no user-space buffers).
+
+    The kernel may copy server-side on NFS 4.2 or share extents on btrfs/XFS.
+    """
+    if not hasattr(os, "copy_file_range"):
+        raise OSError("copy_file_range not supported on this platform")
+    with open(src, "rb") as s, open(target, "wb") as d:
+        size = os.fstat(s.fileno()).st_size
+        remaining = size
+        while remaining > 0:
+            copied = os.copy_file_range(s.fileno(), d.fileno(), remaining)
+            if copied == 0:
+                # Some filesystems/kernels return 0 instead of an error, or the
+                # file shrank: let place_file() redo a regular full copy
+                raise OSError(errno.EIO, "short copy_file_range", src)
+            remaining -= copied
+        if os.fstat(d.fileno()).st_size != size:
+            raise OSError(errno.EIO, "copy_file_range size mismatch", src)
+    shutil.copystat(src, target)
+
+
+def place_file(src: str, target: str, mode: str) -> None:
+    """Put src at target as a hardlink, reflink or copy, copying as a fallback.
+
+    Links avoid moving any data: the merge only creates directory entries.
+    Hardlinked files share their content with the source dataset.
+    """
+    if mode == "link":
+        try:
+            # link(2) does not follow symlinks: link the real file, otherwise
+            # relative symlinks would dangle once placed under target
+            os.link(os.path.realpath(src), target)
+            return
+        except OSError:
+            pass  # other filesystem or no hardlink support
+    elif mode == "reflink":
+        try:
+            _reflink(src, target)
+            return
+        except OSError:
+            pass  # filesystem without copy-on-write support
+    try:
+        _copy_in_kernel(src, target)
+    except OSError:
+        # Older kernels (EXDEV across filesystems, ENOSYS) or non-Linux
+        shutil.copyfile(src, target)
+        shutil.copystat(src, target)
+
+
+def _list_files(path: Path) -> list:
+    """(name, path) of the regular files in path, from one directory read."""
+    # scandir: file type comes with the directory read, no Path/stat per entry
+    with os.scandir(path) as it:
+        return [(entry.name, entry.path) for entry in it if not entry.is_dir()]
+
+
+def merge_split(img_src: Path, lbl_src: Path, img_dst: Path, lbl_dst: Path,
+                mode: str = "copy", workers: int = 1) -> Tuple[int, int]:
+    """Place one dataset's images and labels, returning (images, labels) counts.
+
+    YOLO pairs an image with its label by stem, so collisions are solved per
+    stem across both folders: a renamed stem (stem_1, stem_2, ...) is free in
+    images/ and labels/ alike and is applied to the image and the label.
+    """
+    img_dst.mkdir(parents=True, exist_ok=True)
+    lbl_dst.mkdir(parents=True, exist_ok=True)
+
+    # Resolve every target name first, then place the files concurrently:
+    # the work is syscall latency (open/stat/write), not CPU
+    # Stems already taken are listed once instead of one stat per file
+    taken = {os.path.splitext(name)[0] for dst in (img_dst, lbl_dst) for name in os.listdir(dst)}
+    files = [(name, path, img_dst) for name, path in _list_files(img_src)]
+    n_images = len(files)
+    files += [(name, path, lbl_dst) for name, path in _list_files(lbl_src)]
+
+    # Source stem -> target stem. Stems that do not collide keep their name
+    # first, so a renamed stem can never take one of them.
+    new_stems = dict.fromkeys(os.path.splitext(name)[0] for name, _, _ in files)
+    for stem in new_stems:
+        if stem not in taken:
+            new_stems[stem] = stem
+            taken.add(stem)
+    suffix_counters = defaultdict(int)
+    for stem, new_stem in new_stems.items():
+        if new_stem is not None:
             continue
-        target = dst / file.name
-        # Avoid collisions by prefixing if needed
-        if target.exists():
-            target = dst / f"{file.stem}_{count}{file.suffix}"
-        shutil.copy2(file, target)
-        count += 1
-    return count
+        while new_stem is None or new_stem in taken:
+            suffix_counters[stem] += 1
+            new_stem = f"{stem}_{suffix_counters[stem]}"
+        new_stems[stem] = new_stem
+        taken.add(new_stem)
+
+    pairs = []
+    for name, path, dst in files:
+        stem, suffix = os.path.splitext(name)
+        pairs.append((path, os.path.join(dst, new_stems[stem] + suffix)))
+
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        list(ex.map(lambda pair: place_file(*pair, mode), pairs))
+    return n_images, len(files) - n_images
 
 
 def main() -> None:
@@ -47,8 +161,10 @@ def main() -> None:
         if not img_dir.exists() or not lbl_dir.exists():
             print(f"[WARN] split '{args.split}' not found in {base}")
             continue
-        images_total += copy_tree(img_dir, out / "images" / args.split)
-        labels_total += copy_tree(lbl_dir, out / "labels" / args.split)
+        n_images, n_labels = merge_split(img_dir, lbl_dir, out / "images" / args.split,
+                                         out / "labels" / args.split, args.mode, args.workers)
+        images_total += n_images
+        labels_total += n_labels
         print(f"Merged {base}")
 
     print(f"Done. Copied {images_total} images, {labels_total} labels into {out}")
@@ -2,9 +2,70 @@
 """Convert COCO annotations to YOLO format for a subset of classes."""
 
 import argparse
+import io
 import json
 import os
-from collections import defaultdict
+import tarfile
+import time
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Union
+
+import numpy as np
+
+try:
+    import orjson  # optional, much faster on multi-GB instances_*.json
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec  # optional, decodes only the fields used below
+except ImportError:
+    msgspec = None
+
+try:
+    import ijson  # optional, constant-memory parsing for --stream
+except ImportError:
+    ijson = None
+
+
+LABEL_FORMAT = "%d %.6f %.6f %.6f %.6f\n"
+# O_BINARY keeps "\n" line endings on Windows (no-op elsewhere)
+LABEL_OPEN_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0)
+# ijson prefixes read by --stream; every other event is skipped
+_STREAM_PREFIXES = frozenset({
+    "categories.item", "categories.item.id", "categories.item.name",
+    "images.item", "images.item.id", "images.item.width", "images.item.height",
+    "images.item.file_name",
+    "annotations.item", "annotations.item.image_id", "annotations.item.category_id",
+    "annotations.item.bbox", "annotations.item.bbox.item",
+})
+
+
+if msgspec is not None:
+    # Projection of the COCO schema: heavy fields (segmentation, area,
+    # iscrowd, ...) are skipped by the decoder instead of becoming objects.
+    # Types are as loose as the dict-based loader accepts (float sizes,
+    # string ids); anything else falls back to it in load_coco().
+    class _Category(msgspec.Struct):
+        id: Union[int, str]
+        name: str
+
+    class _Image(msgspec.Struct):
+        id: Union[int, str]
+        width: Optional[float] = None
+        height: Optional[float] = None
+        file_name: str = ""
+
+    class _Annotation(msgspec.Struct):
+        image_id: Union[int, str]
+        category_id: Optional[Union[int, str]] = None
+        bbox: Optional[List[float]] = None
+
+    class _Coco(msgspec.Struct):
+        categories: List[_Category] = []
+        images: List[_Image] = []
+        annotations: List[_Annotation] = []
 
 
 def parse_args() -> argparse.Namespace:
@@ -16,82 +77,297 @@ def parse_args() -> argparse.Namespace:
                         help="List of class names to keep (case insensitive). If omitted, keep all")
     parser.add_argument("--names-file", default=None,
                         help="Optional path to export the ordered class list (names.txt)")
+    parser.add_argument("--workers", type=int, default=min(32, (os.cpu_count() or 1) * 4),
+                        help="Number of label files written concurrently (I/O bound)")
+    parser.add_argument("--single-file", default="off", choices=["off", "jsonl", "tar"],
+                        help="Write all labels to one file in --output-dir instead of one .txt per "
+                             "image: labels.jsonl ({stem, boxes} per line) or labels.tar")
+    parser.add_argument("--stream", action="store_true",
+                        help="Parse the annotations file incrementally with ijson instead of "
+                             "loading it whole (for multi-GB files that do not fit in RAM)")
     return parser.parse_args()
 
 
+def load_json(path: str):
+    """Load a JSON file, with orjson when installed and the stdlib json otherwise."""
+    if orjson is not None:
+        with open(path, "rb") as f:
+            return orjson.loads(f.read())
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _stream_coco(path: str, categories: list, images: dict):
+    """Parse the file once with ijson, yielding ``(image_id, category_id, bbox)``.
+
+    Categories and images are appended to the given containers as their
+    arrays go by, so they are complete once the generator is exhausted.
+    Only the needed fields are picked from the event stream: no object is
+    built for ``segmentation`` or other unused values.
+    """
+    with open(path, "rb") as f:
+        for prefix, event, value in ijson.parse(f, use_float=True):
+            if prefix not in _STREAM_PREFIXES:
+                continue
+            if prefix == "annotations.item":
+                if event == "start_map":
+                    image_id = category_id = bbox = None
+                elif event == "end_map":
+                    yield image_id, category_id, bbox
+            elif prefix == "annotations.item.bbox.item":
+                bbox.append(value)
+            elif prefix == "annotations.item.bbox":
+                if event == "start_array":
+                    bbox = []
+            elif prefix == "annotations.item.image_id":
+                image_id = value
+            elif prefix == "annotations.item.category_id":
+                category_id = value
+            elif prefix == "images.item":
+                if event == "start_map":
+                    img_id = width = height = None
+                    file_name = ""
+                elif event == "end_map":
+                    images[img_id] = (width, height, file_name)
+            elif prefix == "images.item.id":
+                img_id = value
+            elif prefix == "images.item.width":
+                width = value
+            elif prefix == "images.item.height":
+                height = value
+            elif prefix == "images.item.file_name":
+                file_name = value
+            elif prefix == "categories.item":
+                if event == "start_map":
+                    cat_id = name = None
+                elif event == "end_map":
+                    categories.append((cat_id, name))
+            elif prefix == "categories.item.id":
+                cat_id = value
+            elif prefix == "categories.item.name":
+                name = value
+
+
+def load_coco(path: str, stream: bool = False):
+    """Load the COCO fields needed for conversion.
+
+    Returns ``(categories, images, annotations)`` where categories is a list of
+    ``(id, name)``, images maps ``id -> (width, height, file_name)`` and
+    annotations yields ``(image_id, category_id, bbox)``. Uses msgspec when
+    installed, otherwise the regular JSON loader. With ``stream``, the file is
+    parsed in a single ijson pass driven by ``annotations``: categories and
+    images are only complete once it has been consumed.
+    """
+    if stream:
+        if ijson is None:
+            raise SystemExit("--stream requires ijson (pip install ijson)")
+        categories = []
+        images = {}
+        return categories, images, _stream_coco(path, categories, images)
+
+    if msgspec is not None:
+        with open(path, "rb") as f:
+            raw = f.read()
+        try:
+            coco = msgspec.json.decode(raw, type=_Coco)
+        except msgspec.ValidationError:
+            # Valid JSON outside the projection: use the dict-based path below
+            coco = msgspec.json.decode(raw)
+        else:
+            categories = [(c.id, c.name) for c in coco.categories]
+            images = {img.id: (img.width, img.height, img.file_name) for img in coco.images}
+            annotations = ((a.image_id, a.category_id, a.bbox) for a in coco.annotations)
+            return categories, images, annotations
+    else:
+        coco = load_json(path)
+    categories = [(c["id"], c["name"]) for c in coco.get("categories", [])]
+    images = {
+        img["id"]: (img.get("width"), img.get("height"), img.get("file_name", ""))
+        for img in coco.get("images", [])
+    }
+    annotations = (
+        (a["image_id"], a.get("category_id"), a.get("bbox"))
+        for a in coco.get("annotations", [])
+    )
+    return categories, images, annotations
+
+
+def write_label(path: str, payload: bytes) -> None:
+    """Write a label file in one system call, without a Python file object."""
+    fd = os.open(path, LABEL_OPEN_FLAGS, 0o644)
+    try:
+        os.write(fd, payload)
+    finally:
+        os.close(fd)
+
+
+def write_label_files(output_dir: str, labels, workers: int) -> None:
+    """Write ``(stem, payload)`` labels as ``<output_dir>/<stem>.txt`` files."""
+    made_dirs = set()
+    paths = []
+    payloads = []
+    for stem, payload in labels:
+        label_path = os.path.join(output_dir, f"{stem}.txt")
+        label_dir = os.path.dirname(label_path)
+        if label_dir not in made_dirs:
+            os.makedirs(label_dir, exist_ok=True)
+            made_dirs.add(label_dir)
+        paths.append(label_path)
+        payloads.append(payload)
+
+    # Only file I/O is left; os.write releases the GIL so threads overlap it
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        list(ex.map(write_label, paths, payloads))
+
+
+def dump_json_line(record) -> bytes:
+    """Serialize one JSONL record (orjson when installed)."""
+    if orjson is not None:
+        return orjson.dumps(record) + b"\n"
+    return json.dumps(record, separators=(",", ":")).encode() + b"\n"
+
+
+def write_jsonl(path: str, records) -> None:
+    """Write ``(stem, boxes)`` records to a single JSON Lines file."""
+    with open(path, "wb", buffering=1 << 20) as f:
+        for stem, boxes in records:
+            f.write(dump_json_line({"stem": stem, "boxes": boxes}))
+
+
+def write_tar(path: str, labels) -> None:
+    """Stream ``(arcname, payload)`` label files into an uncompressed tar."""
+    mtime = time.time()
+    with tarfile.open(path, "w|") as tar:
+        for arcname, payload in labels:
+            info = tarfile.TarInfo(arcname)
+            info.size = len(payload)
+            info.mtime = mtime
+            info.mode = 0o644
+            tar.addfile(info, io.BytesIO(payload))
+
+
 def main() -> None:
     args = parse_args()
     os.makedirs(args.output_dir, exist_ok=True)
 
-    with open(args.annotations, "r", encoding="utf-8") as f:
-        coco = json.load(f)
+    categories, images, annotations = load_coco(args.annotations, args.stream)
 
-    keep = None
-    if args.classes:
-        keep = {c.lower() for c in args.classes}
+    # Single pass over the annotations: keep flat per-annotation columns for
+    # the vectorized normalization below. Typed arrays store raw machine
+    # values (8 bytes each) instead of Python objects, and NumPy reads them
+    # in place. COCO ids may be any JSON scalar: image and category ids get
+    # a dense row number on first sight, mapped back by row_to_*_id.
+    # Categories are resolved after the pass, which lets --stream read a
+    # file whose categories come after its annotations in one go.
+    ann_rows = array("q")
+    ann_cats = array("q")
+    ann_boxes = array("d")
+    image_id_to_row = {}
+    row_to_image_id = []
+    cat_id_to_row = {}
+    row_to_cat_id = []
+    for image_id, category_id, bbox in annotations:
+        cat_row = cat_id_to_row.get(category_id)
+        if cat_row is None:
+            cat_row = cat_id_to_row[category_id] = len(row_to_cat_id)
+            row_to_cat_id.append(category_id)
+        if not bbox or len(bbox) != 4:  # bbox: [x, y, w, h]
+            continue
+        row = image_id_to_row.get(image_id)
+        if row is None:
+            row = image_id_to_row[image_id] = len(row_to_image_id)
+            row_to_image_id.append(image_id)
+        ann_rows.append(row)
+        ann_cats.append(cat_row)
+        ann_boxes.extend(bbox)
 
-    cat_id_to_name = {c["id"]: c["name"].lower() for c in coco.get("categories", [])}
+    cat_id_to_name = {cat_id: name.lower() for cat_id, name in categories}
+    if args.classes:
+        # Drop unwanted categories up front: unknown ids are then skipped
+        # by the same lookup as filtered ones
+        keep = frozenset(c.lower() for c in args.classes)
+        cat_id_to_name = {cat_id: name for cat_id, name in cat_id_to_name.items() if name in keep}
 
-    # Build class index preserving the order in args.classes or discovery order
+    # Build class index preserving the order in args.classes or discovery order.
+    # Indices always follow insertion order (duplicates are ignored).
     class_to_idx = {}
     if args.classes:
-        for idx, name in enumerate(args.classes):
-            class_to_idx[name.lower()] = idx
-
-    images = {img["id"]: img for img in coco.get("images", [])}
-    annos_by_image = defaultdict(list)
-    for anno in coco.get("annotations", []):
-        cat_name = cat_id_to_name.get(anno.get("category_id"))
-        if not cat_name:
-            continue
-        if keep and cat_name not in keep:
-            continue
-        annos_by_image[anno["image_id"]].append(anno)
-        if cat_name not in class_to_idx:
-            class_to_idx[cat_name] = len(class_to_idx)
+        for name in args.classes:
+            class_to_idx.setdefault(name.lower(), len(class_to_idx))
+
+    # Category row -> class index (-1 if dropped); rows are in order of first
+    # sight, so classes keep their discovery order.
+    cat_row_to_cls = np.full(len(row_to_cat_id), -1, dtype=np.int64)
+    for cat_row, category_id in enumerate(row_to_cat_id):
+        cat_name = cat_id_to_name.get(category_id)
+        if cat_name:
+            cat_row_to_cls[cat_row] = class_to_idx.setdefault(cat_name, len(class_to_idx))
+    ann_cls = cat_row_to_cls[np.frombuffer(ann_cats, dtype=np.int64)]
+    kept = ann_cls >= 0
+
+    # Group annotations by image; the stable sort keeps their original order
+    rows = np.frombuffer(ann_rows, dtype=np.int64)[kept]
+    order = np.argsort(rows, kind="stable")
+    rows = rows[order]
+    cls = ann_cls[kept][order]
+    boxes = np.frombuffer(ann_boxes, dtype=np.float64).reshape(-1, 4)[kept][order]
+    image_rows, starts, counts = np.unique(rows, return_index=True, return_counts=True)
 
-    for image_id, annos in annos_by_image.items():
-        image_info = images.get(image_id)
+    # Per-annotation image size (0 for unknown images, skipped when writing)
+    infos = [images.get(row_to_image_id[row]) for row in image_rows.tolist()]
+    sizes = np.array([(i[0] or 0, i[1] or 0) if i else (0, 0) for i in infos],
+                     dtype=np.float64).reshape(-1, 2)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # True divisions (not multiplies by 1/size) so exact pixel ratios
+        # such as 267/640 round the same way as the scalar formula
+        img_w, img_h = np.repeat(sizes, counts, axis=0).T
+        out = np.column_stack([
+            cls,
+            (boxes[:, 0] + boxes[:, 2] * 0.5) / img_w,
+            (boxes[:, 1] + boxes[:, 3] * 0.5) / img_h,
+            boxes[:, 2] / img_w,
+            boxes[:, 3] / img_h,
+        ])
+
+    values = out.ravel().tolist()
+    n_cols = out.shape[1]
+    # (stem, first row, row count) of every image that gets a label
+    entries = []
+    for image_info, start, count in zip(infos, starts.tolist(), counts.tolist()):
         if not image_info:
             continue
-        width = image_info.get("width")
-        height = image_info.get("height")
-        if not width or not height:
+        img_width, img_height, image_file = image_info
+        if not img_width or not img_height:
             continue
-
-        image_file = image_info.get("file_name", "")
         stem, _ = os.path.splitext(image_file)
-        label_path = os.path.join(args.output_dir, f"{stem}.txt")
+        entries.append((stem, start, count))
 
-        lines = []
-        for anno in annos:
-            cat_name = cat_id_to_name.get(anno.get("category_id"))
-            if cat_name not in class_to_idx:
-                continue
-            bbox = anno.get("bbox")  # [x, y, w, h]
-            if not bbox or len(bbox) != 4:
-                continue
-            x, y, w, h = bbox
-            x_center = (x + w / 2) / width
-            y_center = (y + h / 2) / height
-            w_norm = w / width
-            h_norm = h / height
-            cls_idx = class_to_idx[cat_name]
-            lines.append(f"{cls_idx} {x_center:.6f} {y_center:.6f} {w_norm:.6f} {h_norm:.6f}")
-
-        if lines:
-            os.makedirs(os.path.dirname(label_path), exist_ok=True)
-            with open(label_path, "w", encoding="utf-8") as lf:
-                lf.write("\n".join(lines))
+    if args.single_file == "jsonl":
+        # Same 6-decimal precision as the text labels
+        write_jsonl(os.path.join(args.output_dir, "labels.jsonl"), (
+            (stem, [[int(row[0])] + [round(v, 6) for v in row[1:]]
+                    for row in out[start:start + count].tolist()])
+            for stem, start, count in entries
+        ))
+    else:
+        # Whole file formatted by one C-level %-operation (template repeated per box)
+        labels = (
+            (stem, ((LABEL_FORMAT * count) % tuple(values[start * n_cols:(start + count) * n_cols])).encode())
+            for stem, start, count in entries
+        )
+        if args.single_file == "tar":
+            write_tar(os.path.join(args.output_dir, "labels.tar"),
+                      ((f"{stem}.txt", payload) for stem, payload in labels))
+        else:
+            write_label_files(args.output_dir, labels, args.workers)
 
     if args.names_file:
-        ordered = [None] * len(class_to_idx)
-        for name, idx in class_to_idx.items():
-            ordered[idx] = name
+        ordered = list(class_to_idx)  # insertion order == index order
         with open(args.names_file, "w", encoding="utf-8") as nf:
-            nf.write("\n".join(name for name in ordered if name))
+            nf.write("\n".join(ordered))
 
-    print(f"Processed {len(annos_by_image)} images. Classes: {class_to_idx}")
+    print(f"Processed {len(image_rows)} images. Classes: {class_to_idx}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,65 @@
+import os
+
+import pytest
+
+import merge_datasets as merge
+
+
+def make_dataset(root, images, labels):
+    """Write {name: content} images/labels under root/images|labels/train."""
+    for sub, files in (("images", images), ("labels", labels)):
+        folder = root / sub / "train"
+        folder.mkdir(parents=True)
+        for name, content in files.items():
+            (folder / name).write_text(content, encoding="utf-8")
+    return root
+
+
+def merge_into(tmp_path, *datasets, mode="copy"):
+    out = tmp_path / "out"
+    for dataset in datasets:
+        merge.merge_split(dataset / "images" / "train", dataset / "labels" / "train",
+                          out / "images" / "train", out / "labels" / "train", mode)
+    return {
+        sub: {p.name: p.read_text(encoding="utf-8") for p in (out / sub / "train").iterdir()}
+        for sub in ("images", "labels")
+    }
+
+
+def test_renamed_image_and_label_stay_paired(tmp_path):
+    a = make_dataset(tmp_path / "a", {"foo.jpg": "imgA"}, {"foo.txt": "lblA"})
+    b = make_dataset(tmp_path / "b", {"foo.jpg": "imgB", "foo_1.jpg": "imgB1"}, {"foo.txt": "lblB"})
+    merged = merge_into(tmp_path, a, b)
+    assert merged["images"] == {"foo.jpg": "imgA", "foo_1.jpg": "imgB1", "foo_2.jpg": "imgB"}
+    assert merged["labels"] == {"foo.txt": "lblA", "foo_2.txt": "lblB"}
+
+
+def test_label_without_image_does_not_pair_with_existing_image(tmp_path):
+    a = make_dataset(tmp_path / "a", {"bar.jpg": "imgA"}, {})
+    b = make_dataset(tmp_path / "b", {}, {"bar.txt": "lblB"})
+    merged = merge_into(tmp_path, a, b)
+    assert merged["labels"] == {"bar_1.txt": "lblB"}
+
+
+@pytest.mark.skipif(not hasattr(os, "symlink"), reason="symlinks not supported")
+def test_link_mode_follows_relative_symlinks(tmp_path):
+    shared = tmp_path / "shared"
+    shared.mkdir()
+    (shared / "s.jpg").write_text("real", encoding="utf-8")
+    a = make_dataset(tmp_path / "a", {}, {"rel.txt": "lbl"})
+    os.symlink(os.path.join("..", "..", "..", "shared", "s.jpg"), a / "images" / "train" / "rel.jpg")
+
+    out = tmp_path / "deeper" / "out"
+    merge.merge_split(a / "images" / "train", a / "labels" / "train",
+                      out / "images" / "train", out / "labels" / "train", "link")
+    target = out / "images" / "train" / "rel.jpg"
+    assert not target.is_symlink()
+    assert target.read_text(encoding="utf-8") == "real"
+
+
+def test_short_copy_file_range_falls_back_to_full_copy(tmp_path, monkeypatch):
+    src = tmp_path / "src.jpg"
+    src.write_bytes(b"0123456789")
+    monkeypatch.setattr(os, "copy_file_range", lambda src_fd, dst_fd, count: 0, raising=False)
+    merge.place_file(str(src), str(tmp_path / "dst.jpg"), "copy")
+    assert (tmp_path / "dst.jpg").read_bytes() == b"0123456789"
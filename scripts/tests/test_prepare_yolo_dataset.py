@@ -0,0 +1,164 @@
+import copy
+import json
+import sys
+import tarfile
+
+import pytest
+
+import prepare_yolo_dataset as prep
+
+# 640x480 image: 267/640 == 0.4171875 exactly, the case where multiplying by
+# 1/size would round to 0.417188 instead of 0.417187.
+COCO = {
+    "categories": [
+        {"id": 1, "name": "Person"},
+        {"id": 2, "name": "dog"},
+        {"id": 3, "name": "Bottle", "supercategory": "object"},
+    ],
+    "images": [
+        {"id": 1, "file_name": "sub/img1.jpg", "width": 640, "height": 480},
+        {"id": 2, "file_name": "img2.png", "width": 100, "height": 50, "license": None},
+        {"id": 3, "file_name": "img3.jpg", "width": 10, "height": 10},
+    ],
+    "annotations": [
+        # Malformed bbox: dropped, but bottle is still discovered first
+        {"image_id": 1, "category_id": 3, "bbox": [1, 2, 3]},
+        {"image_id": 1, "category_id": 2, "bbox": [256, 120, 22, 48], "segmentation": [[1, 2, 3, 4]]},
+        {"image_id": 1, "category_id": 1, "bbox": [0, 0, 640, 480], "iscrowd": 0},
+        {"image_id": 1, "category_id": 99, "bbox": [1, 1, 1, 1]},  # unknown category
+        {"image_id": 2, "category_id": 3, "bbox": [10, 5, 20, 10]},
+        {"image_id": 2, "category_id": 1, "bbox": None},
+        {"image_id": 42, "category_id": 1, "bbox": [1, 1, 1, 1]},  # unknown image
+    ],
+}
+
+EXPECTED_ALL = {
+    "sub/img1.txt": "1 0.417187 0.300000 0.034375 0.100000\n2 0.500000 0.500000 1.000000 1.000000\n",
+    "img2.txt": "0 0.200000 0.200000 0.200000 0.200000\n",
+}
+EXPECTED_NAMES_ALL = "bottle\ndog\nperson"
+
+
+def _categories_last(coco):
+    return {"images": coco["images"], "annotations": coco["annotations"], "categories": coco["categories"]}
+
+
+def _float_sizes(coco):
+    for img in coco["images"]:
+        img["width"] = float(img["width"])
+        img["height"] = float(img["height"])
+    return coco
+
+
+def _string_ids(coco):
+    for img in coco["images"]:
+        img["id"] = f"img-{img['id']}"
+    for cat in coco["categories"]:
+        cat["id"] = f"cat-{cat['id']}"
+    for ann in coco["annotations"]:
+        ann["image_id"] = f"img-{ann['image_id']}"
+        ann["category_id"] = f"cat-{ann['category_id']}"
+    return coco
+
+
+def _null_file_name(coco):
+    # Outside the msgspec projection: that path must fall back, not fail
+    coco["images"].append({"id": 7, "file_name": None, "width": 1, "height": 1})
+    return coco
+
+
+VARIANTS = {
+    "plain": lambda coco: coco,
+    "categories_last": _categories_last,
+    "float_sizes": _float_sizes,
+    "string_ids": _string_ids,
+    "null_file_name": _null_file_name,
+}
+
+
+@pytest.fixture(params=["msgspec", "orjson", "json", "stream"])
+def loader(request, monkeypatch):
+    """Force one loader path; returns the extra CLI args it needs."""
+    if request.param in ("msgspec", "orjson") and getattr(prep, request.param) is None:
+        pytest.skip(f"{request.param} not installed")
+    if request.param == "stream":
+        if prep.ijson is None:
+            pytest.skip("ijson not installed")
+        return ["--stream"]
+    if request.param != "msgspec":
+        monkeypatch.setattr(prep, "msgspec", None)
+    if request.param == "json":
+        monkeypatch.setattr(prep, "orjson", None)
+    return []
+
+
+def run(tmp_path, monkeypatch, coco, *args):
+    """Run the script on coco, return ({relative label path: text}, names)."""
+    ann_path = tmp_path / "instances.json"
+    ann_path.write_text(json.dumps(coco), encoding="utf-8")
+    out_dir = tmp_path / "labels"
+    names_path = tmp_path / "names.txt"
+    monkeypatch.setattr(sys, "argv", [
+        "prepare_yolo_dataset.py", "--annotations", str(ann_path), "--images-dir", str(tmp_path),
+        "--output-dir", str(out_dir), "--names-file", str(names_path), *args,
+    ])
+    prep.main()
+    labels = {
+        path.relative_to(out_dir).as_posix(): path.read_text(encoding="utf-8")
+        for path in out_dir.rglob("*") if path.is_file()
+    }
+    return labels, names_path.read_text(encoding="utf-8")
+
+
+@pytest.mark.parametrize("variant", VARIANTS)
+def test_loader_paths_write_expected_labels(tmp_path, monkeypatch, loader, variant):
+    coco = VARIANTS[variant](copy.deepcopy(COCO))
+    labels, names = run(tmp_path, monkeypatch, coco, *loader)
+    assert labels == EXPECTED_ALL
+    assert names == EXPECTED_NAMES_ALL
+
+
+def test_duplicate_classes_keep_first_index(tmp_path, monkeypatch, loader):
+    labels, names = run(tmp_path, monkeypatch, copy.deepcopy(COCO), *loader, "--classes", "dog", "PERSON", "Dog")
+    assert labels == {
+        "sub/img1.txt": "0 0.417187 0.300000 0.034375 0.100000\n1 0.500000 0.500000 1.000000 1.000000\n",
+    }
+    assert names == "dog\nperson"
+
+
+def test_empty_file(tmp_path, monkeypatch, loader, capsys):
+    labels, names = run(tmp_path, monkeypatch, {"images": [], "annotations": [], "categories": []}, *loader)
+    assert labels == {}
+    assert names == ""
+    assert "Processed 0 images" in capsys.readouterr().out
+
+
+def test_stream_parses_file_once(tmp_path, monkeypatch):
+    if prep.ijson is None:
+        pytest.skip("ijson not installed")
+    opened = []
+    real_open = open
+
+    def counting_open(file, *args, **kwargs):
+        if str(file).endswith("instances.json") and "r" in (args[0] if args else kwargs.get("mode", "r")):
+            opened.append(file)
+        return real_open(file, *args, **kwargs)
+
+    monkeypatch.setattr("builtins.open", counting_open)
+    labels, _ = run(tmp_path, monkeypatch, _categories_last(copy.deepcopy(COCO)), "--stream")
+    assert labels == EXPECTED_ALL
+    assert len(opened) == 1
+
+
+def test_single_file_modes_match_label_files(tmp_path, monkeypatch):
+    run(tmp_path, monkeypatch, copy.deepcopy(COCO), "--single-file", "tar")
+    with tarfile.open(tmp_path / "labels" / "labels.tar") as tar:
+        assert {m.name: tar.extractfile(m).read().decode() for m in tar} == EXPECTED_ALL
+
+    run(tmp_path, monkeypatch, copy.deepcopy(COCO), "--single-file", "jsonl")
+    with open(tmp_path / "labels" / "labels.jsonl", encoding="utf-8") as f:
+        records = [json.loads(line) for line in f]
+    assert records == [
+        {"stem": "sub/img1", "boxes": [[1, 0.417187, 0.3, 0.034375, 0.1], [2, 0.5, 0.5, 1.0, 1.0]]},
+        {"stem": "img2", "boxes": [[0, 0.2, 0.2, 0.2, 0.2]]},
+    ]